@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Precomputed answer index for the Mental Health Chatbot
+
+Builds templated responses keyed by topic and intent from the knowledge base
+offline, so the chatbot can answer in milliseconds when the OpenAI API is
+unavailable, over budget or rate-limited. Review the generated file before
+deploying it; every entry can be edited by hand.
+
+Usage:
+    python answer_index.py build [--output answer_index.json]
+"""
+
+import argparse
+import json
+import logging
+import os
+from typing import Dict, Any, Optional
+
+from features import compute_chunk_features, match_topic
+from loader import DocumentLoader
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_ANSWER_INDEX_PATH = "answer_index.json"
+
+# Phrases that identify what the user is asking for, checked in order
+INTENT_KEYWORDS = {
+    "coping": ['how can i', 'how do i', 'what can i do', 'what should i do', 'help me',
+               'tips', 'cope', 'manage', 'deal with', 'stop', 'calm'],
+    "information": ['what is', 'what are', 'what does', 'explain', 'tell me about', 'why do', 'is it normal']
+}
+
+# Intent used when no intent keyword matches
+DEFAULT_INTENT = "support"
+
+# Response templates by intent; {content} is replaced by a knowledge base chunk
+RESPONSE_TEMPLATES = {
+    "coping": (
+        "Here is something that many people find helpful:\n\n{content}\n\n"
+        "Would you like to try this, or talk more about what's going on?"
+    ),
+    "information": (
+        "Here's some information that may help:\n\n{content}\n\n"
+        "Feel free to ask me anything else about this."
+    ),
+    "support": (
+        "Thank you for sharing that with me. What you're feeling matters. "
+        "Something that may help:\n\n{content}\n\n"
+        "I'm here to listen if you'd like to tell me more."
+    )
+}
+
+# Appended to every fast-path response so users know it is a shorter answer
+FAST_PATH_NOTE = (
+    "\n\n(I'm giving a shorter answer than usual right now. If you need more support, "
+    "please consider reaching out to a mental health professional.)"
+)
+
+# Chunks around this many tokens make the most readable templated answers
+TARGET_TOKEN_COUNT = 60
+
+def detect_intent(message: str) -> str:
+    """Classify what the user is asking for from keywords."""
+    message_lower = message.lower()
+    for intent, keywords in INTENT_KEYWORDS.items():
+        if any(keyword in message_lower for keyword in keywords):
+            return intent
+    return DEFAULT_INTENT
+
+class AnswerIndex:
+    """Templated responses keyed by topic and intent, served without calling the LLM."""
+    
+    def __init__(self, entries: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Initialize the answer index.
+        
+        Args:
+            entries (Dict[str, Dict[str, Any]]): Entries keyed by "topic:intent"
+        """
+        self.entries = entries or {}
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    @staticmethod
+    def key(topic: str, intent: str) -> str:
+        """Key of the entry for a topic and intent."""
+        return f"{topic}:{intent}"
+    
+    @classmethod
+    def load(cls, path: str = DEFAULT_ANSWER_INDEX_PATH) -> "AnswerIndex":
+        """
+        Load an answer index from a JSON file.
+        
+        Args:
+            path (str): Path to the answer index file
+        
+        Returns:
+            AnswerIndex: The loaded index, or an empty one if the file is missing or invalid
+        """
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(json.load(f)["entries"])
+        except Exception as e:
+            logger.error(f"Error loading answer index {path}: {e}")
+            return cls()
+    
+    def save(self, path: str = DEFAULT_ANSWER_INDEX_PATH):
+        """Write the answer index to a JSON file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"entries": self.entries}, f, indent=2, ensure_ascii=False)
+        logger.info(f"Saved {len(self.entries)} answers to {path}")
+    
+    @classmethod
+    def build(cls, loader: DocumentLoader, batch_size: int = 500) -> "AnswerIndex":
+        """
+        Build the index from the knowledge base.
+        
+        Picks one chunk per topic, preferring actionable chunks of a readable
+        length, and renders it with each intent's template.
+        
+        Args:
+            loader (DocumentLoader): Loader whose collection holds the knowledge base
+            batch_size (int): Number of chunks fetched per request
+        
+        Returns:
+            AnswerIndex: The built index
+        """
+        best: Dict[str, tuple] = {}
+        offset = 0
+        while True:
+            batch = loader.collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            if not batch['ids']:
+                break
+            offset += len(batch['ids'])
+            
+            for chunk_id, text, metadata in zip(batch['ids'], batch['documents'], batch['metadatas']):
+                features = compute_chunk_features(text, metadata)
+                rank = (not features["actionable"], abs(features["token_count"] - TARGET_TOKEN_COUNT))
+                topic = features["topic"]
+                if topic not in best or rank < best[topic][0]:
+                    best[topic] = (rank, chunk_id, text.strip(), features["source"])
+        
+        # Messages with no recognised topic get the best chunk overall
+        if best and "general" not in best:
+            best["general"] = min(best.values())
+        
+        entries = {}
+        for topic, (_, chunk_id, text, source) in best.items():
+            for intent, template in RESPONSE_TEMPLATES.items():
+                entries[cls.key(topic, intent)] = {
+                    "response": template.format(content=text),
+                    "chunk_id": chunk_id,
+                    "source": source
+                }
+        
+        logger.info(f"Built {len(entries)} answers for {len(best)} topics")
+        return cls(entries)
+    
+    def lookup(self, message: str) -> Optional[str]:
+        """
+        Find a precomputed response for a message.
+        
+        Args:
+            message (str): The user's message
+        
+        Returns:
+            Optional[str]: The response, or None if the index has no answer
+        """
+        # Messages are matched exactly like chunks were tagged at ingestion
+        intent = detect_intent(message)
+        entry = self.entries.get(self.key(match_topic(message), intent)) or \
+            self.entries.get(self.key("general", intent))
+        if entry is None:
+            return None
+        return entry["response"] + FAST_PATH_NOTE
+
+def main():
+    """Command line entry point for building the answer index."""
+    parser = argparse.ArgumentParser(description="Build the precomputed answer index.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--output", default=DEFAULT_ANSWER_INDEX_PATH, help="Answer index file to write")
+    args = parser.parse_args()
+    
+    index = AnswerIndex.build(DocumentLoader())
+    index.save(args.output)
+    print(f"✅ Built {len(index)} answers into {args.output}. Review them before deploying.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Bulk offline batch-answering for the Mental Health Chatbot
+
+Reads a JSONL file of messages ({"id": ..., "message": ...} per line),
+retrieves context for each batch of messages with a single embedding call and
+vector query, answers them with concurrent rate-limited OpenAI calls and
+streams results to a JSONL output file as they complete. Re-running with the
+same output file resumes where the previous run stopped.
+
+Usage:
+    python batch.py questions.jsonl answers.jsonl --rpm 500 --workers 16
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Optional, Set
+from chatbot import MentalHealthChatbot
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """Thread-safe limiter that spaces out calls to stay under a requests-per-minute limit."""
+    
+    def __init__(self, requests_per_minute: float):
+        """
+        Initialize the rate limiter.
+        
+        Args:
+            requests_per_minute (float): Maximum number of calls per minute
+        """
+        self.interval = 60.0 / requests_per_minute
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until the next call is allowed."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+class BatchAnswerer:
+    """Answers a file of messages in bulk using the chatbot's retriever and prompt."""
+    
+    def __init__(self, chatbot, requests_per_minute: float = 60, max_workers: int = 8,
+                 batch_size: int = 256, n_results: Optional[int] = None, max_retries: Optional[int] = None):
+        """
+        Initialize the batch answerer.
+        
+        Args:
+            chatbot (MentalHealthChatbot): Chatbot providing the retriever and OpenAI client
+            requests_per_minute (float): OpenAI request rate limit
+            max_workers (int): Maximum number of concurrent OpenAI requests
+            batch_size (int): Number of messages embedded and retrieved per vector query
+            n_results (int): Number of chunks retrieved per message, defaults to the
+                retriever's context_candidates
+            max_retries (int): Retries per OpenAI request, defaults to the SDK's default
+        """
+        self.chatbot = chatbot
+        self.rate_limiter = RateLimiter(requests_per_minute)
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.n_results = n_results or chatbot.retriever.context_candidates
+        # Unlike chat, batch runs retry transient API errors instead of falling back
+        self.client = chatbot.client if max_retries is None else chatbot.client.with_options(max_retries=max_retries)
+    
+    @staticmethod
+    def load_messages(input_path: str) -> List[Dict[str, Any]]:
+        """
+        Load messages from a JSONL file.
+        
+        Args:
+            input_path (str): Path to the input file
+        
+        Returns:
+            List[Dict[str, Any]]: Messages with an id and message text
+        """
+        items = []
+        with open(input_path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.error(f"Skipping invalid JSON on line {line_number}: {e}")
+                    continue
+                if not record.get("message"):
+                    logger.error(f"Skipping line {line_number}: no message")
+                    continue
+                items.append({"id": str(record.get("id", line_number)), "message": record["message"]})
+        return items
+    
+    @staticmethod
+    def load_completed_ids(output_path: str) -> Set[str]:
+        """
+        Get the ids already answered successfully in a partial output file.
+        
+        Args:
+            output_path (str): Path to the output file
+        
+        Returns:
+            Set[str]: Ids that do not need to be answered again
+        """
+        completed = set()
+        if not os.path.exists(output_path):
+            return completed
+        
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A run interrupted mid-write can leave a truncated last line
+                    continue
+                if record.get("error"):
+                    completed.discard(record.get("id"))
+                else:
+                    completed.add(record.get("id"))
+        return completed
+    
+    def _answer(self, item: Dict[str, Any], context: str) -> Dict[str, Any]:
+        """Answer one message, returning its output record."""
+        self.rate_limiter.acquire()
+        start = time.perf_counter()
+        try:
+            response = self.chatbot.generate_response(item["message"], context, client=self.client)
+            return {"id": item["id"], "message": item["message"], "response": response,
+                    "latency": time.perf_counter() - start}
+        except Exception as e:
+            logger.error(f"Error answering message {item['id']}: {e}")
+            return {"id": item["id"], "message": item["message"], "error": str(e)}
+    
+    def run(self, input_path: str, output_path: str) -> Dict[str, int]:
+        """
+        Answer every message in the input file that is not yet in the output file.
+        
+        Args:
+            input_path (str): Path to the input JSONL file
+            output_path (str): Path to the output JSONL file, appended to
+        
+        Returns:
+            Dict[str, int]: Counts of answered, failed and skipped messages
+        """
+        items = self.load_messages(input_path)
+        completed = self.load_completed_ids(output_path)
+        pending_items = [item for item in items if item["id"] not in completed]
+        stats = {"answered": 0, "failed": 0, "skipped": len(items) - len(pending_items)}
+        logger.info(f"{len(pending_items)} messages to answer, {stats['skipped']} already done")
+        
+        start = time.perf_counter()
+        with open(output_path, "a", encoding="utf-8") as out, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            
+            def write(record: Dict[str, Any]):
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                stats["failed" if record.get("error") else "answered"] += 1
+            
+            def drain(futures: set, limit: int) -> set:
+                # Write completed results until at most `limit` are in flight
+                while len(futures) > limit:
+                    done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write(future.result())
+                return futures
+            
+            futures = set()
+            for i in range(0, len(pending_items), self.batch_size):
+                batch = pending_items[i:i + self.batch_size]
+                
+                # Emergency messages get the crisis response without an API call
+                to_answer = []
+                for item in batch:
+                    if self.chatbot.retriever.check_emergency_keywords(item["message"]):
+                        write({"id": item["id"], "message": item["message"],
+                               "response": self.chatbot._get_emergency_response(colored=False), "emergency": True})
+                    else:
+                        to_answer.append(item)
+                
+                # One embedding call and one vector query for the whole batch
+                retrieved = self.chatbot.retriever.retrieve_batch(
+                    [item["message"] for item in to_answer], n_results=self.n_results
+                )
+                
+                # Contexts are built as in chat, including cross-encoder re-ranking
+                for item, chunks in zip(to_answer, retrieved):
+                    context = self.chatbot.retriever.build_context(item["message"], chunks)
+                    futures.add(executor.submit(self._answer, item, context))
+                
+                # Keep retrieval at most a couple of batches ahead of the API calls
+                futures = drain(futures, self.batch_size * 2)
+            
+            drain(futures, 0)
+        
+        elapsed = time.perf_counter() - start
+        logger.info(f"Batch finished in {elapsed:.1f}s: {stats}")
+        return stats
+
+def main():
+    """Command line entry point for batch answering."""
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of messages in bulk.")
+    parser.add_argument("input", help="Input JSONL file with one {\"id\", \"message\"} object per line")
+    parser.add_argument("output", help="Output JSONL file; existing results are kept and skipped")
+    parser.add_argument("--rpm", type=float, default=60, help="OpenAI requests per minute (default: 60)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent OpenAI requests (default: 8)")
+    parser.add_argument("--batch-size", type=int, default=256,
+                        help="Messages per embedding batch and vector query (default: 256)")
+    parser.add_argument("--retries", type=int, help="Retries per OpenAI request (default: the SDK's default of 2)")
+    args = parser.parse_args()
+    
+    chatbot = MentalHealthChatbot()
+    answerer = BatchAnswerer(
+        chatbot,
+        requests_per_minute=args.rpm,
+        max_workers=args.workers,
+        batch_size=args.batch_size,
+        max_retries=args.retries
+    )
+    stats = answerer.run(args.input, args.output)
+    print(f"✅ Answered {stats['answered']}, failed {stats['failed']}, skipped {stats['skipped']}")
+
+if __name__ == "__main__":
+    main()
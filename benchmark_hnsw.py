@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+HNSW parameter benchmark for the Mental Health Chatbot knowledge base
+
+Sweeps HNSW construction and search parameters (M, construction_ef,
+search_ef) and compares each index against exact brute-force search over the
+same embeddings. Reports recall@k, query latency, build time and index size
+so DocumentLoader's hnsw_params can be chosen from data.
+
+Indexes are built with hnswlib (the chroma-hnswlib package ChromaDB itself
+uses) rather than through a collection: ChromaDB answers queries over recent,
+not yet flushed inserts with an exact brute-force buffer, which would hide
+the effect of M and ef, and it fixes search_ef when the collection is created.
+One index is built per (M, construction_ef) and search_ef is varied on it.
+
+Queries should be real user questions (--queries-file, in the JSONL format
+batch.py reads): they sit much further from the chunks than the perturbed
+corpus vectors used otherwise, which are near-duplicates and overstate recall.
+
+Usage:
+    python benchmark_hnsw.py --queries-file questions.jsonl --m 8 16 32 --search-ef 10 50 100
+    python benchmark_hnsw.py --synthetic 20000 --k 5
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from itertools import product
+from typing import List, Dict, Any, Tuple
+
+import hnswlib
+import numpy as np
+import chromadb
+from chromadb.config import Settings
+from chromadb.utils import embedding_functions
+
+from loader import COLLECTION_NAME, DEFAULT_HNSW_PARAMS
+
+def load_corpus_embeddings(persist_directory: str, batch_size: int = 1000) -> np.ndarray:
+    """
+    Load every chunk embedding from the knowledge base collection.
+    
+    Args:
+        persist_directory (str): Directory where ChromaDB data is stored
+        batch_size (int): Number of embeddings fetched per request
+    
+    Returns:
+        np.ndarray: Embeddings, one row per chunk
+    """
+    client = chromadb.PersistentClient(path=persist_directory, settings=Settings(anonymized_telemetry=False))
+    collection = client.get_collection(COLLECTION_NAME)
+    
+    embeddings = []
+    offset = 0
+    while True:
+        batch = collection.get(include=["embeddings"], limit=batch_size, offset=offset)
+        if not batch['ids']:
+            break
+        embeddings.extend(batch['embeddings'])
+        offset += len(batch['ids'])
+    return np.asarray(embeddings, dtype=np.float32)
+
+def load_query_embeddings(queries_path: str) -> np.ndarray:
+    """
+    Embed real questions with the model the knowledge base was built with.
+    
+    Args:
+        queries_path (str): JSONL file with one {"message": ...} object per line
+    
+    Returns:
+        np.ndarray: Normalized query embeddings, one row per question
+    """
+    messages = []
+    with open(queries_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                message = json.loads(line).get("message")
+                if message:
+                    messages.append(message)
+    
+    embeddings = np.asarray(embedding_functions.DefaultEmbeddingFunction()(messages), dtype=np.float32)
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+def make_queries(corpus: np.ndarray, n_queries: int, noise: float, seed: int) -> np.ndarray:
+    """
+    Build query vectors by perturbing random corpus vectors.
+    
+    Only a fallback when no real questions are available: perturbed chunks
+    are near-duplicates of the corpus, the easiest case for HNSW, so recall
+    is higher than for real questions.
+    """
+    rng = np.random.default_rng(seed)
+    base = corpus[rng.integers(0, len(corpus), size=n_queries)]
+    queries = base + rng.normal(scale=noise, size=base.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def exact_neighbours(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Ground-truth top-k neighbours by cosine similarity, via brute force."""
+    normalized = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    similarities = queries @ normalized.T
+    top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(similarities, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+def build_index(corpus: np.ndarray, m: int, construction_ef: int) -> Tuple[hnswlib.Index, float, int]:
+    """
+    Build a cosine HNSW index over the corpus.
+    
+    Args:
+        corpus (np.ndarray): Corpus embeddings
+        m (int): Maximum number of links per node (hnsw:M)
+        construction_ef (int): Candidate list size while building (hnsw:construction_ef)
+        
+    Returns:
+        Tuple[hnswlib.Index, float, int]: The index, build time in seconds and
+        serialized index size in bytes
+    """
+    index = hnswlib.Index(space="cosine", dim=corpus.shape[1])
+    start = time.perf_counter()
+    index.init_index(max_elements=len(corpus), M=m, ef_construction=construction_ef)
+    index.add_items(corpus, np.arange(len(corpus)))
+    build_time = time.perf_counter() - start
+    
+    fd, path = tempfile.mkstemp(suffix=".hnsw")
+    os.close(fd)
+    try:
+        index.save_index(path)
+        size = os.path.getsize(path)
+    finally:
+        os.remove(path)
+    return index, build_time, size
+
+def measure_search(index: hnswlib.Index, queries: np.ndarray, truth: np.ndarray, k: int,
+                   search_ef: int) -> Dict[str, float]:
+    """
+    Measure recall and latency of an index at one search_ef.
+    
+    Args:
+        index (hnswlib.Index): The index to query
+        queries (np.ndarray): Query embeddings
+        truth (np.ndarray): Exact top-k neighbour positions for each query
+        k (int): Number of neighbours
+        search_ef (int): Candidate list size while searching (hnsw:search_ef)
+        
+    Returns:
+        Dict[str, float]: recall@k and p50/p95 latency in milliseconds
+    """
+    index.set_ef(max(search_ef, k))
+    
+    # One query at a time, as the chatbot issues them
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        labels, _ = index.knn_query(query, k=k, num_threads=1)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(labels[0].tolist()) & set(expected.tolist()))
+    
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        f"recall@{k}": hits / truth.size,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95))
+    }
+
+def main():
+    """Command line entry point for the HNSW benchmark."""
+    parser = argparse.ArgumentParser(description="Sweep HNSW parameters against exact search.")
+    parser.add_argument("--persist-directory", default="./chroma_db", help="ChromaDB directory with the corpus")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Use N random 384-dimensional vectors instead of the corpus")
+    parser.add_argument("--m", type=int, nargs="+", default=[DEFAULT_HNSW_PARAMS["hnsw:M"]])
+    parser.add_argument("--construction-ef", type=int, nargs="+",
+                        default=[DEFAULT_HNSW_PARAMS["hnsw:construction_ef"]])
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--k", type=int, default=5, help="Neighbours per query (n_results)")
+    parser.add_argument("--queries-file",
+                        help="JSONL file of real questions ({\"message\": ...} per line) to use as queries")
+    parser.add_argument("--queries", type=int, default=200,
+                        help="Number of perturbed corpus queries without --queries-file")
+    parser.add_argument("--noise", type=float, default=0.02, help="Perturbation scale without --queries-file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+    
+    if args.synthetic:
+        rng = np.random.default_rng(args.seed)
+        corpus = rng.normal(size=(args.synthetic, 384)).astype(np.float32)
+    else:
+        corpus = load_corpus_embeddings(args.persist_directory)
+    
+    if len(corpus) <= args.k:
+        print(f"❌ Need more than k={args.k} vectors, found {len(corpus)}. Try --synthetic.")
+        return
+    
+    if args.queries_file:
+        if args.synthetic:
+            print("❌ --queries-file needs the real corpus; drop --synthetic.")
+            return
+        queries = load_query_embeddings(args.queries_file)
+        query_source = args.queries_file
+    else:
+        queries = make_queries(corpus, args.queries, args.noise, args.seed)
+        query_source = f"perturbed corpus vectors (noise {args.noise})"
+    
+    start = time.perf_counter()
+    truth = exact_neighbours(corpus, queries, args.k)
+    brute_ms = (time.perf_counter() - start) / len(queries) * 1000
+    
+    # How close queries are to their nearest chunk; near 1 means near-duplicates and optimistic recall
+    normalized = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    top_similarity = float(np.mean(np.sum(queries * normalized[truth[:, 0]], axis=1)))
+    
+    print(f"📊 HNSW benchmark: {len(corpus)} vectors, {len(queries)} queries, k={args.k}")
+    print(f"Queries: {query_source}, mean top-1 cosine similarity {top_similarity:.2f}")
+    if not args.queries_file:
+        print("⚠️  Perturbed queries overstate recall; pass --queries-file with real questions.")
+    print(f"Brute force: {brute_ms:.3f} ms/query")
+    print("=" * 96)
+    header = f"{'M':>4} {'ef_c':>6} {'ef_s':>6} {'recall':>8} {'p50 ms':>8} {'p95 ms':>8} {'build s':>9} {'index MB':>9}"
+    print(header)
+    
+    results: List[Dict[str, Any]] = []
+    for m, construction_ef in product(args.m, args.construction_ef):
+        index, build_time, index_size = build_index(corpus, m, construction_ef)
+        for search_ef in args.search_ef:
+            result = {
+                "M": m,
+                "construction_ef": construction_ef,
+                "search_ef": search_ef,
+                **measure_search(index, queries, truth, args.k, search_ef),
+                "build_s": build_time,
+                "index_mb": index_size / 2**20
+            }
+            results.append(result)
+            print(f"{m:>4} {construction_ef:>6} {search_ef:>6} {result[f'recall@{args.k}']:>8.3f} "
+                  f"{result['p50_ms']:>8.3f} {result['p95_ms']:>8.3f} {result['build_s']:>9.2f} "
+                  f"{result['index_mb']:>9.2f}")
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"vectors": len(corpus), "queries": len(queries), "query_source": query_source,
+                       "top_similarity": top_similarity, "k": args.k,
+                       "brute_force_ms": brute_ms, "results": results}, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark comparing the list-of-dicts retrieval format with RetrievalResults.
+
+Simulates the post-processing done by `get_mental_health_context` and
+`get_therapeutic_suggestions` on synthetic ChromaDB query output and reports
+time per query and memory allocated to hold each result set.
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+from results import RetrievalResults
+
+def make_query_results(n_results: int) -> dict:
+    """Build synthetic output shaped like `collection.query` for one query."""
+    return {
+        'ids': [[f"doc_{i}" for i in range(n_results)]],
+        'documents': [[f"Chunk {i} about coping strategies. " * 20 for i in range(n_results)]],
+        'metadatas': [[{"source": "benchmark", "topic": "coping"} for _ in range(n_results)]],
+        'distances': [[random.random() for _ in range(n_results)]]
+    }
+
+def build_dicts(results: dict) -> list:
+    """Original approach: build a dict per hit."""
+    chunks = []
+    for doc, metadata, distance in zip(
+        results['documents'][0],
+        results['metadatas'][0],
+        results['distances'][0]
+    ):
+        chunks.append({
+            'content': doc,
+            'metadata': metadata,
+            'distance': distance,
+            'relevance_score': 1 - distance
+        })
+    return chunks
+
+def filter_dicts(chunks: list, threshold: float) -> list:
+    """Original approach: re-loop over the dicts to filter."""
+    return [chunk['content'] for chunk in chunks if chunk['relevance_score'] > threshold]
+
+def build_columnar(results: dict) -> RetrievalResults:
+    """Columnar approach: wrap the ChromaDB lists without copying them."""
+    return RetrievalResults.from_query(results)
+
+def filter_columnar(chunks: RetrievalResults, threshold: float) -> list:
+    """Columnar approach: index-only filter, text accessed only for kept hits."""
+    return chunks.filter(threshold).contents()
+
+def measure(build, filter_func, batches: list, threshold: float) -> tuple:
+    """
+    Measure one result representation over a set of queries.
+    
+    Returns:
+        tuple: (microseconds per query, bytes allocated per query to hold the results)
+    """
+    start = time.perf_counter()
+    for results in batches:
+        filter_func(build(results), threshold)
+    elapsed = time.perf_counter() - start
+    
+    # Keep every result set alive, as a server does for in-flight requests
+    tracemalloc.start()
+    held = [build(results) for results in batches]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    
+    return elapsed / len(batches) * 1e6, allocated / len(batches)
+
+def main():
+    """Run the benchmark."""
+    n_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    random.seed(0)
+    
+    print(f"📊 Retrieval result benchmark ({n_queries} queries)")
+    print("=" * 50)
+    for n_results in (3, 5, 20, 100):
+        batches = [make_query_results(n_results) for _ in range(n_queries)]
+        dict_time, dict_bytes = measure(build_dicts, filter_dicts, batches, 0.5)
+        col_time, col_bytes = measure(build_columnar, filter_columnar, batches, 0.5)
+        print(f"n_results={n_results}")
+        print(f"  list of dicts: {dict_time:8.2f} us/query, {dict_bytes:8.0f} bytes/query")
+        print(f"  columnar:      {col_time:8.2f} us/query, {col_bytes:8.0f} bytes/query")
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,13 @@ import os
 import openai
 from dotenv import load_dotenv
 from retriever import MentalHealthRetriever
-from loader import DocumentLoader
+from reranker import CrossEncoderReranker
+from loader import DocumentLoader, SUPPORTED_EXTENSIONS
+from watcher import KnowledgeBaseWatcher
+from answer_index import AnswerIndex, DEFAULT_ANSWER_INDEX_PATH
 import logging
+import threading
+from collections import Counter, deque
 from colorama import init, Fore, Style
 import time
 
@@ -14,6 +19,9 @@ init(autoreset=True)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Seconds to stop calling the LLM after it fails or rate-limits us
+LLM_COOLDOWN_SECONDS = 30
+
 class MentalHealthChatbot:
     """A mental health chatbot that provides therapeutic support using OpenAI."""
     
@@ -29,11 +37,49 @@ class MentalHealthChatbot:
         
         self.client = openai.OpenAI(api_key=api_key)
         
-        # Initialize retriever
-        self.retriever = MentalHealthRetriever()
+        # Interactive requests fall back to precomputed answers instead of being retried
+        self.interactive_client = self.client.with_options(max_retries=0)
+        
+        # Optionally re-rank retrieved chunks with a local cross-encoder
+        reranker = None
+        if os.getenv("ENABLE_RERANKER", "false").lower() in ("1", "true", "yes"):
+            reranker = CrossEncoderReranker()
+        
+        # Initialize loader for adding new documents; it applies any HNSW
+        # settings before the retriever loads the index
+        hnsw_params = {
+            key: int(os.getenv(env_var))
+            for key, env_var in (("hnsw:M", "HNSW_M"),
+                                 ("hnsw:construction_ef", "HNSW_CONSTRUCTION_EF"),
+                                 ("hnsw:search_ef", "HNSW_SEARCH_EF"))
+            if os.getenv(env_var)
+        }
+        self.loader = DocumentLoader(hnsw_params=hnsw_params)
+        
+        # Initialize retriever and warm it up in the background
+        self.retriever = MentalHealthRetriever(reranker=reranker)
+        self.retriever.start_warm_up(openai_client=self.client)
+        
+        # Make sure chunks stored by older versions have precomputed features
+        self.loader.backfill_chunk_features()
+        
+        # Precomputed answers served when the LLM is unavailable, slow, over budget or rate-limited
+        self.answer_index = AnswerIndex.load(DEFAULT_ANSWER_INDEX_PATH)
+        if not len(self.answer_index):
+            logger.warning(f"No answers in {DEFAULT_ANSWER_INDEX_PATH}; LLM failures will get an apology. "
+                           "Run `python answer_index.py build` and review the output to enable fallback answers.")
         
-        # Initialize loader for adding new documents
-        self.loader = DocumentLoader()
+        # LLM latency and token budgets (token budget is per rolling hour, unlimited if unset)
+        self.llm_timeout = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+        token_budget = os.getenv("LLM_TOKENS_PER_HOUR")
+        self.llm_tokens_per_hour = int(token_budget) if token_budget else None
+        self._token_usage = deque()
+        self._llm_unavailable_until = 0.0
+        self._llm_cooldown_reason = ""
+        self._llm_lock = threading.Lock()
+        
+        # How often each response path is taken
+        self.path_metrics = Counter()
         
         # System prompt for mental health support
         self.system_prompt = """You are a compassionate mental health support chatbot. Your role is to:
@@ -55,6 +101,81 @@ Key guidelines:
 
 Remember: You are a support tool, not a replacement for professional mental health care."""
 
+    def generate_response(self, user_message: str, context: str = "", client=None) -> str:
+        """
+        Get response from OpenAI API, raising on API errors.
+        
+        Args:
+            user_message (str): The user's message
+            context (str): Relevant context from retriever
+            client: OpenAI client to use, defaults to self.client (with the SDK's retries)
+            
+        Returns:
+            str: AI-generated response
+        """
+        # Prepare the conversation
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": f"Context: {context}\n\nUser message: {user_message}"}
+        ]
+        
+        # Get response from OpenAI
+        response = (client or self.client).chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=messages,
+            max_tokens=500,
+            temperature=0.7,
+            top_p=0.9,
+            timeout=self.llm_timeout
+        )
+        
+        # Usage is only tracked against a budget, and only for the last hour
+        if self.llm_tokens_per_hour is not None and response.usage is not None:
+            now = time.time()
+            with self._llm_lock:
+                self._token_usage.append((now, response.usage.total_tokens))
+                self._prune_token_usage(now)
+        
+        return response.choices[0].message.content.strip()
+
+    def _prune_token_usage(self, now: float):
+        """Drop token usage older than an hour; the caller must hold _llm_lock."""
+        while self._token_usage and self._token_usage[0][0] < now - 3600:
+            self._token_usage.popleft()
+
+    def _llm_skip_reason(self) -> str:
+        """Get why the LLM should not be called right now, or an empty string if it can be."""
+        now = time.time()
+        with self._llm_lock:
+            if now < self._llm_unavailable_until:
+                return self._llm_cooldown_reason
+            
+            if self.llm_tokens_per_hour is not None:
+                self._prune_token_usage(now)
+                if sum(tokens for _, tokens in self._token_usage) >= self.llm_tokens_per_hour:
+                    return "over_budget"
+        return ""
+
+    def _record_path(self, path: str):
+        """Count which path produced a response."""
+        with self._llm_lock:
+            self.path_metrics[path] += 1
+
+    def get_path_metrics(self) -> dict:
+        """
+        Get how often each response path has been taken.
+        
+        Returns:
+            dict: Count and share of responses per path
+        """
+        with self._llm_lock:
+            counts = dict(self.path_metrics)
+        total = sum(counts.values())
+        return {
+            path: {"count": count, "share": count / total}
+            for path, count in sorted(counts.items())
+        }
+
     def get_ai_response(self, user_message: str, context: str = "") -> str:
         """
         Get response from OpenAI API.
@@ -69,44 +190,78 @@ Remember: You are a support tool, not a replacement for professional mental heal
         try:
             # Check for emergency keywords first
             if self.retriever.check_emergency_keywords(user_message):
+                self._record_path("emergency")
                 return self._get_emergency_response()
             
-            # Prepare the conversation
-            messages = [
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": f"Context: {context}\n\nUser message: {user_message}"}
-            ]
+            reason = self._llm_skip_reason()
+            if not reason:
+                try:
+                    response = self.generate_response(user_message, context, client=self.interactive_client)
+                    self._record_path("llm")
+                    return response
+                except openai.RateLimitError as e:
+                    logger.warning(f"OpenAI rate limit reached: {e}")
+                    reason = "rate_limited"
+                except openai.APITimeoutError as e:
+                    logger.warning(f"OpenAI request exceeded {self.llm_timeout}s: {e}")
+                    reason = "timeout"
+                except openai.APIConnectionError as e:
+                    logger.error(f"Could not reach OpenAI: {e}")
+                    reason = "unavailable"
+                except openai.APIStatusError as e:
+                    logger.error(f"Error getting AI response: {e}")
+                    reason = "unavailable" if e.status_code >= 500 else "error"
+                except Exception as e:
+                    logger.error(f"Error getting AI response: {e}")
+                    reason = "error"
+                
+                # Give the API time to recover before calling it again; other
+                # errors (e.g. a rejected message) only affect this request
+                if reason != "error":
+                    with self._llm_lock:
+                        self._llm_unavailable_until = time.time() + LLM_COOLDOWN_SECONDS
+                        self._llm_cooldown_reason = reason
             
-            # Get response from OpenAI
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                max_tokens=500,
-                temperature=0.7,
-                top_p=0.9
-            )
+            # Serve a precomputed answer instead of waiting on the LLM
+            fast_response = self.answer_index.lookup(user_message)
+            if fast_response:
+                self._record_path(f"fast_path_{reason}")
+                return fast_response
             
-            return response.choices[0].message.content.strip()
+            self._record_path("apology")
+            return "I'm having trouble processing your message right now. Please try again in a moment."
             
         except Exception as e:
             logger.error(f"Error getting AI response: {e}")
+            self._record_path("apology")
             return "I'm having trouble processing your message right now. Please try again in a moment."
 
-    def _get_emergency_response(self) -> str:
-        """Get emergency response for crisis situations."""
+    def _get_emergency_response(self, colored: bool = True) -> str:
+        """
+        Get emergency response for crisis situations.
+        
+        Args:
+            colored (bool): Include terminal colour codes; disable for plain-text output
+            
+        Returns:
+            str: Emergency response with crisis resources
+        """
         resources = self.retriever.get_emergency_resources()
+        red, yellow, cyan, green, white = (
+            (Fore.RED, Fore.YELLOW, Fore.CYAN, Fore.GREEN, Fore.WHITE) if colored else ("",) * 5
+        )
         
-        response = f"""{Fore.RED}I'm concerned about what you're sharing. Your safety is important.
+        response = f"""{red}I'm concerned about what you're sharing. Your safety is important.
 
-{Fore.YELLOW}Please consider reaching out to one of these resources immediately:
+{yellow}Please consider reaching out to one of these resources immediately:
 
-{Fore.CYAN}National Suicide Prevention Lifeline: {resources['National Suicide Prevention Lifeline']}
+{cyan}National Suicide Prevention Lifeline: {resources['National Suicide Prevention Lifeline']}
 Crisis Text Line: {resources['Crisis Text Line']}
 Emergency Services: {resources['Emergency Services']}
 
-{Fore.GREEN}You don't have to go through this alone. Professional help is available and can make a real difference.
+{green}You don't have to go through this alone. Professional help is available and can make a real difference.
 
-{Fore.WHITE}Would you like to talk about what's going on, or would you prefer to connect with one of these resources right now?"""
+{white}Would you like to talk about what's going on, or would you prefer to connect with one of these resources right now?"""
         
         return response
 
@@ -181,36 +336,54 @@ Emergency Services: {resources['Emergency Services']}
         """
         Add documents to the knowledge base.
         
+        Files are re-chunked and upserted in place, so adding a file again
+        replaces its previous chunks and unchanged files are skipped.
+        
         Args:
             file_path (str): Path to a specific file
             directory_path (str): Path to a directory containing documents
         """
         try:
             if file_path:
-                if file_path.endswith('.txt'):
-                    documents = self.loader.load_text_file(file_path)
-                elif file_path.endswith('.pdf'):
-                    documents = self.loader.load_pdf_file(file_path)
-                elif file_path.endswith('.docx'):
-                    documents = self.loader.load_docx_file(file_path)
-                else:
+                if not file_path.endswith(SUPPORTED_EXTENSIONS):
                     print(f"{Fore.RED}Unsupported file type: {file_path}")
                     return
                 
-                chunks = self.loader.split_documents(documents)
-                self.loader.add_documents_to_chroma(chunks)
+                self.loader.index_file(file_path)
                 print(f"{Fore.GREEN}Successfully added {file_path} to knowledge base!")
                 
             elif directory_path:
-                documents = self.loader.load_documents_from_directory(directory_path)
-                chunks = self.loader.split_documents(documents)
-                self.loader.add_documents_to_chroma(chunks)
+                for filename in os.listdir(directory_path):
+                    if filename.endswith(SUPPORTED_EXTENSIONS):
+                        self.loader.index_file(os.path.join(directory_path, filename))
                 print(f"{Fore.GREEN}Successfully added documents from {directory_path} to knowledge base!")
                 
         except Exception as e:
             logger.error(f"Error adding to knowledge base: {e}")
             print(f"{Fore.RED}Error adding to knowledge base: {e}")
 
+    def watch_knowledge_base(self, directory_path: str, poll_interval: float = 2.0,
+                             debounce: float = 1.0) -> KnowledgeBaseWatcher:
+        """
+        Keep the knowledge base in sync with a directory in the background.
+        
+        Args:
+            directory_path (str): Directory containing documents
+            poll_interval (float): Seconds between directory scans
+            debounce (float): Seconds a file must be unchanged before it is reindexed
+            
+        Returns:
+            KnowledgeBaseWatcher: The running watcher
+        """
+        watcher = KnowledgeBaseWatcher(
+            self.loader,
+            directory_path,
+            poll_interval=poll_interval,
+            debounce=debounce
+        )
+        watcher.start()
+        return watcher
+
 def main():
     """Main function to run the chatbot."""
     try:
@@ -221,8 +394,24 @@ def main():
         print(f"{Fore.YELLOW}Initializing knowledge base...")
         chatbot.loader.create_sample_mental_health_data()
         
+        # Keep the documents folder in sync with the knowledge base
+        if os.path.isdir("documents"):
+            chatbot.watch_knowledge_base("documents")
+        
+        # Wait for the retriever to finish warming up
+        print(f"{Fore.YELLOW}Warming up...")
+        if chatbot.retriever.wait_until_ready(timeout=60):
+            readiness = chatbot.retriever.get_readiness()
+            if readiness['error']:
+                print(f"{Fore.YELLOW}Warm-up finished with errors: {readiness['error']}")
+            else:
+                print(f"{Fore.GREEN}Ready (warm-up took {readiness['timings']['total']:.1f}s)")
+        else:
+            print(f"{Fore.YELLOW}Warm-up is still running; first responses may be slower.")
+        
         # Start chat
         chatbot.chat()
+        logger.info(f"Response paths: {chatbot.get_path_metrics()}")
         
     except ValueError as e:
         print(f"{Fore.RED}Configuration Error: {e}")
@@ -0,0 +1,109 @@
+import re
+from typing import Any, Callable, Dict, List
+
+# Registry of features computed once per chunk at ingestion time and stored
+# as ChromaDB metadata. Each feature receives the chunk text and its original
+# metadata and must return a str, int, float or bool.
+CHUNK_FEATURES: Dict[str, Callable[[str, Dict[str, Any]], Any]] = {}
+
+# Keywords that mark a chunk as containing actionable advice
+ACTIONABLE_KEYWORDS = ['try', 'practice', 'exercise', 'technique', 'method']
+
+# Keywords used to assign a topic to chunks loaded without one
+TOPIC_KEYWORDS = {
+    "CBT": ['cognitive behavioral', 'cbt', 'thought pattern'],
+    "mindfulness": ['mindfulness', 'meditation', 'present moment'],
+    "breathing_exercises": ['breathing', 'inhale', 'exhale'],
+    "sleep_hygiene": ['sleep', 'insomnia', 'bedtime'],
+    "ocd": ['ocd', 'obsessive', 'compulsive', 'intrusive thought'],
+    "anxiety": ['anxiety', 'anxious', 'panic', 'worry'],
+    "depression": ['depression', 'depressed', 'low mood'],
+    "stress": ['stress', 'overwhelmed', 'burnout'],
+    "exercise": ['physical activity', 'endorphins', 'workout']
+}
+
+# Keywords only match at the start of a word, so "stressed" is stress but "distress" is not
+_TOPIC_PATTERNS = {
+    topic: re.compile(r"\b(?:" + "|".join(re.escape(keyword) for keyword in keywords) + ")")
+    for topic, keywords in TOPIC_KEYWORDS.items()
+}
+
+def match_topic(text: str) -> str:
+    """
+    Detect the topic of a chunk or user message from keywords.
+    
+    Args:
+        text (str): Chunk or message text
+    
+    Returns:
+        str: The first matching topic, or "general"
+    """
+    text_lower = text.lower()
+    for topic, pattern in _TOPIC_PATTERNS.items():
+        if pattern.search(text_lower):
+            return topic
+    return "general"
+
+def register_feature(name: str):
+    """
+    Register a function as a precomputed chunk feature.
+    
+    Args:
+        name (str): Metadata key the feature is stored under
+    """
+    def decorator(func: Callable[[str, Dict[str, Any]], Any]):
+        CHUNK_FEATURES[name] = func
+        return func
+    return decorator
+
+@register_feature("actionable")
+def is_actionable(text: str, metadata: Dict[str, Any]) -> bool:
+    """Whether the chunk suggests something the user can do."""
+    text_lower = text.lower()
+    return any(keyword in text_lower for keyword in ACTIONABLE_KEYWORDS)
+
+@register_feature("token_count")
+def count_tokens(text: str, metadata: Dict[str, Any]) -> int:
+    """Approximate number of word tokens in the chunk."""
+    return len(re.findall(r"\w+", text))
+
+@register_feature("topic")
+def detect_topic(text: str, metadata: Dict[str, Any]) -> str:
+    """Topic of the chunk, taken from its metadata or detected from keywords."""
+    if metadata.get("topic"):
+        return str(metadata["topic"])
+    return match_topic(text)
+
+@register_feature("source")
+def detect_source(text: str, metadata: Dict[str, Any]) -> str:
+    """Source of the chunk."""
+    return str(metadata.get("source") or "unknown")
+
+def compute_chunk_features(text: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compute all registered features for a chunk.
+    
+    Args:
+        text (str): The chunk text
+        metadata (Dict[str, Any]): The chunk's original metadata
+    
+    Returns:
+        Dict[str, Any]: A copy of the metadata with all features added
+    """
+    metadata = dict(metadata or {})
+    for name, feature in CHUNK_FEATURES.items():
+        metadata[name] = feature(text, metadata)
+    return metadata
+
+def missing_features(metadata: Dict[str, Any]) -> List[str]:
+    """
+    Get the registered features a chunk's metadata does not have yet.
+    
+    Args:
+        metadata (Dict[str, Any]): The chunk's metadata
+    
+    Returns:
+        List[str]: Names of the missing features
+    """
+    metadata = metadata or {}
+    return [name for name in CHUNK_FEATURES if name not in metadata]
@@ -1,5 +1,6 @@
 import os
-from typing import List, Optional
+import hashlib
+from typing import List, Optional, Set
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import (
     TextLoader,
@@ -11,20 +12,42 @@ from langchain.schema import Document
 import chromadb
 from chromadb.config import Settings
 import logging
+from features import compute_chunk_features, missing_features
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# File extensions the loader knows how to read
+SUPPORTED_EXTENSIONS = ('.txt', '.pdf', '.docx')
+
+# Name of the ChromaDB collection holding the knowledge base
+COLLECTION_NAME = "mental_health_knowledge"
+
+# HNSW index parameters used when the collection is created (ChromaDB defaults).
+# Larger M and construction_ef give better recall at the cost of build time and
+# index size; larger search_ef gives better recall at the cost of query latency.
+# Use benchmark_hnsw.py to pick values for your corpus.
+# Only search_ef can be changed on an existing collection.
+DEFAULT_HNSW_PARAMS = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 16,
+    "hnsw:construction_ef": 100,
+    "hnsw:search_ef": 10
+}
+
 class DocumentLoader:
     """Handles loading and processing of documents for the mental health chatbot."""
     
-    def __init__(self, persist_directory: str = "./chroma_db"):
+    def __init__(self, persist_directory: str = "./chroma_db", hnsw_params: Optional[dict] = None):
         """
         Initialize the document loader.
         
         Args:
             persist_directory (str): Directory to persist ChromaDB data
+            hnsw_params (dict): HNSW parameters overriding DEFAULT_HNSW_PARAMS, e.g.
+                {"hnsw:M": 32, "hnsw:search_ef": 50}. hnsw:search_ef is also applied
+                to an existing collection; the others only when it is first created.
         """
         self.persist_directory = persist_directory
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -40,11 +63,52 @@ class DocumentLoader:
             settings=Settings(anonymized_telemetry=False)
         )
         
+        requested_params = hnsw_params or {}
+        self.hnsw_params = {**DEFAULT_HNSW_PARAMS, **requested_params}
+        
         # Create or get collection
         self.collection = self.client.get_or_create_collection(
-            name="mental_health_knowledge",
-            metadata={"hnsw:space": "cosine"}
+            name=COLLECTION_NAME,
+            metadata=self.hnsw_params
         )
+        
+        # Collections created before these parameters were configurable only
+        # record hnsw:space, so missing keys were built with ChromaDB's defaults
+        existing_params = {**DEFAULT_HNSW_PARAMS, **(self.collection.metadata or {})}
+        if "hnsw:search_ef" in requested_params:
+            self._apply_search_ef(requested_params["hnsw:search_ef"], existing_params["hnsw:search_ef"])
+        mismatched = [
+            key for key, value in requested_params.items()
+            if key != "hnsw:search_ef" and existing_params.get(key) != value
+        ]
+        for key in mismatched:
+            logger.warning(
+                f"Collection {COLLECTION_NAME} was created with {key}={existing_params[key]}; "
+                f"requested {requested_params[key]} only applies after the collection is rebuilt"
+            )
+    
+    def _apply_search_ef(self, search_ef: int, recorded_search_ef: int):
+        """
+        Change hnsw:search_ef on the existing collection.
+        
+        Args:
+            search_ef (int): Requested search_ef
+            recorded_search_ef (int): search_ef recorded in the collection metadata
+        """
+        # ChromaDB 0.6+ keeps HNSW settings in the collection configuration, where
+        # ef_search can be modified; older versions fix it when the collection is created
+        try:
+            hnsw_configuration = (self.collection.configuration or {}).get("hnsw") or {}
+            if hnsw_configuration.get("ef_search", recorded_search_ef) == search_ef:
+                return
+            self.collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+            logger.info(f"Set hnsw:search_ef={search_ef} on collection {COLLECTION_NAME}")
+        except Exception as e:
+            if recorded_search_ef != search_ef:
+                logger.warning(
+                    f"Could not change hnsw:search_ef on collection {COLLECTION_NAME} ({e}); "
+                    f"requested {search_ef} only applies after the collection is rebuilt"
+                )
     
     def load_text_file(self, file_path: str) -> List[Document]:
         """Load a text file and return documents."""
@@ -90,6 +154,18 @@ class DocumentLoader:
             logger.error(f"Error loading URL {url}: {e}")
             return []
     
+    def load_file(self, file_path: str) -> List[Document]:
+        """Load a supported file based on its extension and return documents."""
+        if file_path.endswith('.txt'):
+            return self.load_text_file(file_path)
+        elif file_path.endswith('.pdf'):
+            return self.load_pdf_file(file_path)
+        elif file_path.endswith('.docx'):
+            return self.load_docx_file(file_path)
+        
+        logger.error(f"Unsupported file type: {file_path}")
+        return []
+    
     def load_documents_from_directory(self, directory_path: str) -> List[Document]:
         """Load all supported documents from a directory."""
         documents = []
@@ -101,12 +177,8 @@ class DocumentLoader:
         for filename in os.listdir(directory_path):
             file_path = os.path.join(directory_path, filename)
             
-            if filename.endswith('.txt'):
-                documents.extend(self.load_text_file(file_path))
-            elif filename.endswith('.pdf'):
-                documents.extend(self.load_pdf_file(file_path))
-            elif filename.endswith('.docx'):
-                documents.extend(self.load_docx_file(file_path))
+            if filename.endswith(SUPPORTED_EXTENSIONS):
+                documents.extend(self.load_file(file_path))
         
         logger.info(f"Loaded {len(documents)} documents from directory: {directory_path}")
         return documents
@@ -128,7 +200,7 @@ class DocumentLoader:
         
         # Prepare data for ChromaDB
         texts = [doc.page_content for doc in documents]
-        metadatas = [doc.metadata for doc in documents]
+        metadatas = [compute_chunk_features(doc.page_content, doc.metadata) for doc in documents]
         ids = [f"doc_{i}" for i in range(len(documents))]
         
         # Add to collection
@@ -140,6 +212,108 @@ class DocumentLoader:
         
         logger.info(f"Added {len(documents)} documents to ChromaDB")
     
+    def index_file(self, file_path: str, force: bool = False) -> int:
+        """
+        Re-chunk a single file and upsert its chunks, replacing any chunks from a previous version.
+        
+        Chunk ids are derived from the file path, so re-indexing a file overwrites
+        its old chunks in place instead of adding duplicates. Files whose content
+        hash matches the indexed version are skipped unless force is set.
+        
+        Args:
+            file_path (str): Path to the file
+            force (bool): Re-index even if the content has not changed
+            
+        Returns:
+            int: Number of chunks written
+        """
+        file_path = os.path.abspath(file_path)
+        try:
+            with open(file_path, 'rb') as f:
+                file_hash = hashlib.sha256(f.read()).hexdigest()
+            
+            existing = self.collection.get(where={"file_path": file_path}, include=["metadatas"])
+            if not force and existing['ids'] and all(
+                metadata.get("file_hash") == file_hash for metadata in existing['metadatas']
+            ):
+                logger.info(f"Skipping unchanged file: {file_path}")
+                return 0
+            
+            chunks = self.split_documents(self.load_file(file_path))
+            if not chunks and existing['ids'] and os.path.getsize(file_path) > 0:
+                # Keep the previous version rather than wiping it on a failed load
+                logger.warning(f"No chunks loaded from {file_path}; keeping indexed version")
+                return 0
+            
+            key = hashlib.sha1(file_path.encode('utf-8')).hexdigest()[:16]
+            ids = [f"file_{key}_{i}" for i in range(len(chunks))]
+            
+            # Remove chunks left over from a longer previous version of the file
+            stale_ids = list(set(existing['ids']) - set(ids))
+            if stale_ids:
+                self.collection.delete(ids=stale_ids)
+            
+            if chunks:
+                self.collection.upsert(
+                    documents=[chunk.page_content for chunk in chunks],
+                    metadatas=[
+                        compute_chunk_features(
+                            chunk.page_content,
+                            {**chunk.metadata, "file_path": file_path, "file_hash": file_hash}
+                        )
+                        for chunk in chunks
+                    ],
+                    ids=ids
+                )
+            
+            logger.info(f"Indexed {len(chunks)} chunks from {file_path} ({len(stale_ids)} stale removed)")
+            return len(chunks)
+            
+        except Exception as e:
+            logger.error(f"Error indexing file {file_path}: {e}")
+            return 0
+    
+    def remove_file(self, file_path: str) -> int:
+        """
+        Delete all chunks that were indexed from a file.
+        
+        Args:
+            file_path (str): Path to the file
+            
+        Returns:
+            int: Number of chunks deleted
+        """
+        file_path = os.path.abspath(file_path)
+        try:
+            existing = self.collection.get(where={"file_path": file_path}, include=["metadatas"])
+            if existing['ids']:
+                self.collection.delete(ids=existing['ids'])
+            logger.info(f"Removed {len(existing['ids'])} chunks from {file_path}")
+            return len(existing['ids'])
+        except Exception as e:
+            logger.error(f"Error removing file {file_path}: {e}")
+            return 0
+    
+    def get_indexed_files(self, batch_size: int = 500) -> Set[str]:
+        """
+        Get the paths of all files that have chunks indexed with index_file.
+        
+        Args:
+            batch_size (int): Number of chunks to scan per request
+            
+        Returns:
+            Set[str]: Absolute file paths
+        """
+        files = set()
+        offset = 0
+        while True:
+            batch = self.collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+            if not batch['ids']:
+                break
+            offset += len(batch['ids'])
+            files.update(metadata["file_path"] for metadata in batch['metadatas'] if metadata and metadata.get("file_path"))
+        return files
+    
     def create_sample_mental_health_data(self):
         """Create sample mental health data for testing."""
         sample_data = [
@@ -167,7 +341,7 @@ class DocumentLoader:
         
         # Add sample data to ChromaDB
         texts = [item["content"] for item in sample_data]
-        metadatas = [item["metadata"] for item in sample_data]
+        metadatas = [compute_chunk_features(item["content"], item["metadata"]) for item in sample_data]
         ids = [f"sample_{i}" for i in range(len(sample_data))]
         
         self.collection.add(
@@ -177,9 +351,57 @@ class DocumentLoader:
         )
         
         logger.info("Added sample mental health data to ChromaDB")
+    
+    def backfill_chunk_features(self, batch_size: int = 500) -> int:
+        """
+        Compute precomputed chunk features for chunks that were stored without them.
+        
+        Args:
+            batch_size (int): Number of chunks to scan per request
+            
+        Returns:
+            int: Number of chunks updated
+        """
+        updated = 0
+        offset = 0
+        try:
+            while True:
+                batch = self.collection.get(
+                    include=["metadatas"],
+                    limit=batch_size,
+                    offset=offset
+                )
+                if not batch['ids']:
+                    break
+                offset += len(batch['ids'])
+                
+                # Only fetch the text of chunks that are missing a feature
+                stale_ids = [
+                    chunk_id for chunk_id, metadata in zip(batch['ids'], batch['metadatas'])
+                    if missing_features(metadata)
+                ]
+                if not stale_ids:
+                    continue
+                
+                stale = self.collection.get(ids=stale_ids, include=["documents", "metadatas"])
+                self.collection.update(
+                    ids=stale['ids'],
+                    metadatas=[
+                        compute_chunk_features(text, metadata)
+                        for text, metadata in zip(stale['documents'], stale['metadatas'])
+                    ]
+                )
+                updated += len(stale['ids'])
+        except Exception as e:
+            logger.error(f"Error backfilling chunk features: {e}")
+        
+        if updated:
+            logger.info(f"Backfilled features for {updated} chunks")
+        return updated
 
 if __name__ == "__main__":
     # Test the loader
     loader = DocumentLoader()
     loader.create_sample_mental_health_data()
+    loader.backfill_chunk_features()
     print("Sample mental health data loaded successfully!") 
\ No newline at end of file
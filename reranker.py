@@ -0,0 +1,243 @@
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+from results import RetrievalResults
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Small cross-encoder trained for passage ranking (~22M parameters, runs on CPU)
+DEFAULT_CROSS_ENCODER = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+class CrossEncoderReranker:
+    """
+    Re-scores retrieved chunks with a local cross-encoder.
+    
+    All uncached (query, chunk) pairs are scored in one batched forward pass,
+    and scores are kept in an LRU cache keyed by query and chunk id. CPU cost is bounded by a latency
+    budget: re-ranking is skipped when the predicted cost of the uncached pairs
+    exceeds the budget or too many re-ranks are already running, in which case
+    callers fall back to the bi-encoder order. While over budget, one probe
+    re-rank is allowed every `probe_interval` seconds so the estimate can
+    recover. The model is never loaded on the request path: until `warm_up`
+    or a background load has finished, and for `load_retry_interval` seconds
+    after a failed load, re-ranking is skipped.
+    """
+    
+    def __init__(self, model_name: str = DEFAULT_CROSS_ENCODER, cache_size: int = 10000,
+                 latency_budget: float = 0.2, max_concurrent: int = 2, min_score: float = 0.1,
+                 probe_interval: float = 10.0, load_retry_interval: float = 300.0):
+        """
+        Initialize the re-ranker.
+        
+        Args:
+            model_name (str): sentence-transformers cross-encoder model
+            cache_size (int): Maximum number of cached (query, chunk) scores
+            latency_budget (float): Maximum predicted seconds to spend per re-rank
+            max_concurrent (int): Maximum number of re-ranks running at once
+            min_score (float): Minimum relevance probability (sigmoid of the
+                cross-encoder logit, 0 to 1) for a chunk to be kept
+            probe_interval (float): Seconds between probe re-ranks while over budget
+            load_retry_interval (float): Seconds to wait before retrying a failed model load
+        """
+        self.model_name = model_name
+        self.cache_size = cache_size
+        self.latency_budget = latency_budget
+        self.max_concurrent = max_concurrent
+        self.min_score = min_score
+        self.probe_interval = probe_interval
+        self.load_retry_interval = load_retry_interval
+        
+        self._model = None
+        self._loading = False
+        self._load_retry_at = 0.0
+        self._skip_next_timing = False
+        self._last_measured = 0.0
+        self._model_lock = threading.Lock()
+        self._cache: "OrderedDict[tuple, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._seconds_per_pair = 0.0
+        self.stats = {"reranked": 0, "skipped": 0, "cache_hits": 0, "scored_pairs": 0}
+    
+    @property
+    def loaded(self) -> bool:
+        """Whether the model is loaded and re-ranking can run."""
+        return self._model is not None
+    
+    def _load_model(self):
+        """Load the cross-encoder, raising if it cannot be loaded; blocks, so never call per request."""
+        with self._model_lock:
+            if self._model is not None:
+                return self._model
+            try:
+                from sentence_transformers import CrossEncoder
+                start = time.perf_counter()
+                model = CrossEncoder(self.model_name)
+            except Exception:
+                self._load_retry_at = time.monotonic() + self.load_retry_interval
+                raise
+            logger.info(f"Loaded cross-encoder {self.model_name} in {time.perf_counter() - start:.2f}s")
+            # The first forward pass after loading is slow; don't let it skew the estimate
+            self._skip_next_timing = True
+            self._model = model
+            return model
+    
+    def start_loading(self) -> bool:
+        """
+        Load the model in a background thread, unless it is loaded, already
+        loading or a failed load is waiting out `load_retry_interval`.
+        
+        Returns:
+            bool: Whether a load was started
+        """
+        with self._lock:
+            if self._model is not None or self._loading or time.monotonic() < self._load_retry_at:
+                return False
+            self._loading = True
+        
+        def load():
+            try:
+                self._load_model()
+            except Exception as e:
+                logger.error(f"Could not load cross-encoder {self.model_name}, retrying in "
+                             f"{self.load_retry_interval:.0f}s: {e}")
+            finally:
+                with self._lock:
+                    self._loading = False
+        
+        threading.Thread(target=load, name="reranker-load", daemon=True).start()
+        return True
+    
+    def warm_up(self):
+        """Load the model and run one dummy forward pass."""
+        self._load_model().predict([("warm up", "warm up")])
+        # The slow first pass is done, so the next real pass can be timed
+        with self._lock:
+            self._skip_next_timing = False
+    
+    @staticmethod
+    def _cache_keys(chunks: RetrievalResults) -> List[tuple]:
+        """Short cache keys for chunks, so the cache doesn't hold copies of their text."""
+        # Re-indexing a file reuses its chunk ids, so include the file's content hash
+        return [(chunk_id, chunks.metadata(i).get("file_hash"))
+                for i, chunk_id in enumerate(chunks.chunk_ids())]
+    
+    def score(self, query: str, documents: List[str], keys: Optional[List] = None) -> np.ndarray:
+        """
+        Score documents against a query, using cached scores where available.
+        
+        Args:
+            query (str): The user's query
+            documents (List[str]): Chunk texts to score
+            keys (List): Hashable cache key per document, e.g. its chunk id;
+                defaults to the texts themselves
+        
+        Returns:
+            np.ndarray: One cross-encoder score per document
+        """
+        if keys is None:
+            keys = documents
+        scores = np.empty(len(documents), dtype=np.float32)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get((query, key))
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end((query, key))
+                    scores[i] = cached
+            self.stats["cache_hits"] += len(documents) - len(missing)
+        
+        if missing:
+            # One batched forward pass for every uncached pair; only predict is timed
+            model = self._model
+            if model is None:
+                raise RuntimeError(f"Cross-encoder {self.model_name} is not loaded")
+            start = time.perf_counter()
+            predicted = model.predict([(query, documents[i]) for i in missing])
+            elapsed = time.perf_counter() - start
+            
+            with self._lock:
+                if self._skip_next_timing:
+                    self._skip_next_timing = False
+                else:
+                    per_pair = elapsed / len(missing)
+                    self._seconds_per_pair = per_pair if not self._seconds_per_pair else \
+                        0.8 * self._seconds_per_pair + 0.2 * per_pair
+                    self._last_measured = time.monotonic()
+                self.stats["scored_pairs"] += len(missing)
+                for i, score in zip(missing, predicted):
+                    scores[i] = score
+                    self._cache[(query, keys[i])] = float(score)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        
+        return scores
+    
+    def _count_uncached(self, query: str, keys: List) -> int:
+        """Number of (query, chunk) pairs that would need a forward pass."""
+        with self._lock:
+            return sum(1 for key in keys if (query, key) not in self._cache)
+    
+    def rerank(self, query: str, chunks: RetrievalResults, top_k: int) -> Optional[RetrievalResults]:
+        """
+        Re-rank retrieved chunks and keep the best ones.
+        
+        Args:
+            query (str): The user's query
+            chunks (RetrievalResults): Candidate chunks from the bi-encoder
+            top_k (int): Maximum number of chunks to keep
+        
+        Returns:
+            Optional[RetrievalResults]: Chunks ordered by cross-encoder score, with
+            those below min_score dropped (possibly none left), or None if
+            re-ranking was skipped
+        """
+        if not chunks:
+            return chunks
+        
+        if self._model is None:
+            # Never load on the request path; fall back to vector order meanwhile
+            self.start_loading()
+            with self._lock:
+                self.stats["skipped"] += 1
+            return None
+        
+        keys = self._cache_keys(chunks)
+        predicted_cost = self._count_uncached(query, keys) * self._seconds_per_pair
+        
+        with self._lock:
+            over_budget = predicted_cost > self.latency_budget
+            # While over budget, probe occasionally so the estimate can recover
+            probe = over_budget and time.monotonic() - self._last_measured >= self.probe_interval
+            if self._in_flight >= self.max_concurrent or (over_budget and not probe):
+                self.stats["skipped"] += 1
+                return None
+            if probe:
+                self._last_measured = time.monotonic()
+            self._in_flight += 1
+        
+        try:
+            scores = self.score(query, chunks.contents(), keys)
+        except Exception as e:
+            logger.error(f"Error re-ranking chunks for query '{query}': {e}")
+            return None
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        
+        # ms-marco cross-encoders output uncalibrated logits; threshold on a probability
+        probabilities = 1 / (1 + np.exp(-scores))
+        order = np.argsort(-scores, kind="stable")
+        order = order[probabilities[order] > self.min_score][:top_k]
+        with self._lock:
+            self.stats["reranked"] += 1
+        return chunks.reorder(order)
@@ -0,0 +1,157 @@
+import numpy as np
+from typing import List, Dict, Any
+
+# Below this many hits, plain Python beats the fixed cost of numpy calls
+NUMPY_MIN_HITS = 20
+
+class RetrievalResults:
+    """
+    Compact, columnar view over the hits of a single ChromaDB query.
+    
+    The documents, metadatas and distances lists returned by ChromaDB are kept
+    as-is and shared between filtered views; only the positions of the hits are
+    stored per view, so filtering never copies text or builds per-hit dicts.
+    Distances are converted to a numpy array only when a view is large enough
+    for vectorized filtering to pay off, or when `distances` is read.
+    """
+    
+    __slots__ = ('ids', 'documents', 'metadatas', '_distances', '_array', '_index')
+    
+    def __init__(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]],
+                 distances, index=None):
+        """
+        Initialize the results.
+        
+        Args:
+            ids (List[str]): Chunk ids, as returned by ChromaDB
+            documents (List[str]): Chunk texts, as returned by ChromaDB
+            metadatas (List[Dict[str, Any]]): Chunk metadata, as returned by ChromaDB
+            distances: Distances between the query and each chunk
+            index: Positions of the hits in this view (list or np.ndarray), or None for all hits
+        """
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self._distances = distances
+        self._array = None
+        self._index = index
+    
+    @classmethod
+    def empty(cls) -> "RetrievalResults":
+        """Create an empty result set."""
+        return cls([], [], [], [])
+    
+    @classmethod
+    def from_query(cls, results: Dict[str, Any], row: int = 0) -> "RetrievalResults":
+        """
+        Create results from the output of `collection.query`.
+        
+        Args:
+            results (Dict[str, Any]): ChromaDB query output
+            row (int): Which query in the batch to take
+        
+        Returns:
+            RetrievalResults: The hits for that query
+        """
+        if not results.get('documents') or not results['documents'][row]:
+            return cls.empty()
+        
+        return cls(
+            results['ids'][row],
+            results['documents'][row],
+            results['metadatas'][row],
+            results['distances'][row]
+        )
+    
+    def __len__(self) -> int:
+        return len(self._distances) if self._index is None else len(self._index)
+    
+    def _positions(self):
+        """Positions of the hits in this view."""
+        return range(len(self._distances)) if self._index is None else self._index
+    
+    def _view(self, index) -> "RetrievalResults":
+        """Create a view over a subset of the underlying hits."""
+        view = RetrievalResults(self.ids, self.documents, self.metadatas, self._distances, index)
+        view._array = self._array
+        return view
+    
+    @property
+    def distances(self) -> np.ndarray:
+        """Distances of all underlying hits, converted to an array on first use."""
+        if self._array is None:
+            self._array = np.asarray(self._distances, dtype=np.float64)
+        return self._array
+    
+    @property
+    def relevance_scores(self) -> np.ndarray:
+        """Relevance score (1 - distance) of each hit in this view."""
+        distances = self.distances if self._index is None else self.distances[self._index]
+        return 1 - distances
+    
+    def filter(self, min_score: float) -> "RetrievalResults":
+        """
+        Keep only hits whose relevance score is above a threshold.
+        
+        Args:
+            min_score (float): Exclusive lower bound on the relevance score
+        
+        Returns:
+            RetrievalResults: View over the remaining hits
+        """
+        if len(self) < NUMPY_MIN_HITS:
+            distances = self._distances
+            return self._view([i for i in self._positions() if 1 - distances[i] > min_score])
+        
+        keep = np.flatnonzero(self.relevance_scores > min_score)
+        return self._view(keep if self._index is None else np.asarray(self._index)[keep])
+    
+    def take(self, n: int) -> "RetrievalResults":
+        """Keep only the first n hits."""
+        return self._view(list(range(min(n, len(self._distances)))) if self._index is None else self._index[:n])
+    
+    def reorder(self, order) -> "RetrievalResults":
+        """
+        Select and reorder hits, e.g. by re-ranking scores.
+        
+        Args:
+            order: Positions within this view, in the new order
+            
+        Returns:
+            RetrievalResults: View over the selected hits
+        """
+        return self._view(np.asarray(self._positions(), dtype=np.intp)[order])
+    
+    def content(self, i: int) -> str:
+        """Text of the i-th hit."""
+        return self.documents[self._positions()[i]]
+    
+    def metadata(self, i: int) -> Dict[str, Any]:
+        """Metadata of the i-th hit."""
+        return self.metadatas[self._positions()[i]]
+    
+    def contents(self) -> List[str]:
+        """Texts of all hits in this view."""
+        return [self.documents[i] for i in self._positions()]
+    
+    def chunk_ids(self) -> List[str]:
+        """Chunk ids of all hits in this view."""
+        return [self.ids[i] for i in self._positions()]
+    
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Convert to the list-of-dicts format returned by `retrieve_relevant_chunks`.
+        
+        Returns:
+            List[Dict[str, Any]]: One dict per hit with content, metadata,
+            distance and relevance_score
+        """
+        return [
+            {
+                'content': self.documents[i],
+                'metadata': self.metadatas[i],
+                'distance': float(self._distances[i]),
+                'relevance_score': 1 - float(self._distances[i])
+            }
+            for i in self._positions()
+        ]
@@ -1,23 +1,49 @@
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Any
+from chromadb.utils import embedding_functions
+from typing import List, Dict, Any, Optional
 import logging
+import threading
+import time
+from results import RetrievalResults
+from reranker import CrossEncoderReranker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Queries used to prime the index and embedding model during warm-up
+DEFAULT_WARM_UP_QUERIES = [
+    "I'm feeling anxious",
+    "I can't sleep at night",
+    "How can I manage stress?",
+    "I feel depressed",
+    "How do I practice mindfulness?"
+]
+
 class MentalHealthRetriever:
     """Handles retrieval of relevant mental health information from ChromaDB."""
     
-    def __init__(self, persist_directory: str = "./chroma_db"):
+    def __init__(self, persist_directory: str = "./chroma_db", n_results: int = 5, context_results: int = 3,
+                 reranker: Optional[CrossEncoderReranker] = None, rerank_candidates: int = 10,
+                 rerank_top_k: int = 2):
         """
         Initialize the retriever.
         
         Args:
             persist_directory (str): Directory where ChromaDB data is stored
+            n_results (int): Default number of chunks to retrieve per query
+            context_results (int): Number of chunks retrieved for the chat context
+            reranker (CrossEncoderReranker): Optional re-ranker for the chat context
+            rerank_candidates (int): Number of chunks fetched for the re-ranker to score
+            rerank_top_k (int): Maximum number of re-ranked chunks kept in the context
         """
         self.persist_directory = persist_directory
+        self.n_results = n_results
+        self.context_results = context_results
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates
+        self.rerank_top_k = rerank_top_k
         
         # Initialize ChromaDB client
         self.client = chromadb.PersistentClient(
@@ -25,70 +51,230 @@ class MentalHealthRetriever:
             settings=Settings(anonymized_telemetry=False)
         )
         
+        # Use the same embedding model the collection was built with
+        self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        
         # Get the collection
-        self.collection = self.client.get_collection("mental_health_knowledge")
+        self.collection = self.client.get_collection(
+            "mental_health_knowledge",
+            embedding_function=self.embedding_function
+        )
+        
+        # Warm-up state
+        self._ready = threading.Event()
+        self._warm_up_thread = None
+        self.warm_up_timings: Dict[str, float] = {}
+        self.warm_up_error: Optional[str] = None
     
-    def retrieve_relevant_chunks(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
+    def warm_up(self, common_queries: Optional[List[str]] = None, openai_client=None) -> Dict[str, float]:
         """
-        Retrieve relevant chunks based on the user's query.
+        Load the embedding model and index so the first user query is fast.
+        
+        Args:
+            common_queries (List[str]): Queries used to prime caches
+            openai_client: Optional OpenAI client whose connection should be opened
+            
+        Returns:
+            Dict[str, float]: Seconds spent in each warm-up phase
+        """
+        if common_queries is None:
+            common_queries = DEFAULT_WARM_UP_QUERIES
+        
+        timings = {}
+        total_start = time.perf_counter()
+        try:
+            # Load the embedding model with a dummy embedding
+            start = time.perf_counter()
+            embedding = self.embedding_function(["warm up"])
+            timings['embedding_model'] = time.perf_counter() - start
+            
+            # Load the HNSW index with a single nearest-neighbour lookup
+            start = time.perf_counter()
+            if self.collection.count() > 0:
+                self.collection.query(query_embeddings=embedding, n_results=1)
+            timings['index'] = time.perf_counter() - start
+            
+            # Load the cross-encoder; without it answers fall back to bi-encoder order
+            if self.reranker is not None:
+                start = time.perf_counter()
+                try:
+                    self.reranker.warm_up()
+                except Exception as e:
+                    logger.warning(f"Could not warm up the re-ranker, continuing without it: {e}")
+                timings['reranker'] = time.perf_counter() - start
+            
+            # Prime caches with common queries
+            start = time.perf_counter()
+            for query in common_queries:
+                self.retrieve(query)
+            timings['common_queries'] = time.perf_counter() - start
+            
+            # Open the OpenAI connection so the first request reuses it
+            if openai_client is not None:
+                start = time.perf_counter()
+                openai_client.models.list()
+                timings['openai_connection'] = time.perf_counter() - start
+            
+            self.warm_up_error = None
+        except Exception as e:
+            logger.error(f"Error during warm-up: {e}")
+            self.warm_up_error = str(e)
+        finally:
+            timings['total'] = time.perf_counter() - total_start
+            self.warm_up_timings = timings
+            self._ready.set()
+        
+        logger.info(f"Warm-up finished in {timings['total']:.2f}s: {timings}")
+        return timings
+    
+    def start_warm_up(self, common_queries: Optional[List[str]] = None, openai_client=None) -> threading.Thread:
+        """
+        Run warm-up in a background thread.
+        
+        Args:
+            common_queries (List[str]): Queries used to prime caches
+            openai_client: Optional OpenAI client whose connection should be opened
+            
+        Returns:
+            threading.Thread: The warm-up thread
+        """
+        if self._warm_up_thread is not None and self._warm_up_thread.is_alive():
+            return self._warm_up_thread
+        
+        self._ready.clear()
+        self._warm_up_thread = threading.Thread(
+            target=self.warm_up,
+            args=(common_queries, openai_client),
+            name="retriever-warm-up",
+            daemon=True
+        )
+        self._warm_up_thread.start()
+        return self._warm_up_thread
+    
+    @property
+    def is_ready(self) -> bool:
+        """Whether warm-up has finished."""
+        return self._ready.is_set()
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until warm-up has finished.
+        
+        Args:
+            timeout (float): Maximum seconds to wait, or None to wait forever
+            
+        Returns:
+            bool: True if warm-up finished within the timeout
+        """
+        return self._ready.wait(timeout)
+    
+    def get_readiness(self) -> Dict[str, Any]:
+        """
+        Get the readiness status, suitable for a health check endpoint.
+        
+        Returns:
+            Dict[str, Any]: Readiness flag, warm-up timings and last error
+        """
+        return {
+            "ready": self.is_ready,
+            "timings": dict(self.warm_up_timings),
+            "error": self.warm_up_error
+        }
+    
+    def retrieve(self, query: str, n_results: Optional[int] = None, where: Optional[Dict[str, Any]] = None) -> RetrievalResults:
+        """
+        Retrieve relevant chunks as a compact columnar result set.
         
         Args:
             query (str): The user's query/question
-            n_results (int): Number of relevant chunks to retrieve
+            n_results (int): Number of relevant chunks to retrieve, defaults to self.n_results
+            where (Dict[str, Any]): Optional ChromaDB metadata filter, e.g. on
+                precomputed chunk features
             
         Returns:
-            List[Dict[str, Any]]: List of relevant chunks with their metadata
+            RetrievalResults: Relevant chunks with their metadata and distances
         """
         try:
             # Query the collection
             results = self.collection.query(
                 query_texts=[query],
-                n_results=n_results,
+                n_results=n_results or self.n_results,
+                where=where,
                 include=["documents", "metadatas", "distances"]
             )
             
-            # Format results
-            chunks = []
-            if results['documents'] and results['documents'][0]:
-                for i, (doc, metadata, distance) in enumerate(zip(
-                    results['documents'][0],
-                    results['metadatas'][0],
-                    results['distances'][0]
-                )):
-                    chunks.append({
-                        'content': doc,
-                        'metadata': metadata,
-                        'distance': distance,
-                        'relevance_score': 1 - distance  # Convert distance to relevance score
-                    })
-            
+            chunks = RetrievalResults.from_query(results)
             logger.info(f"Retrieved {len(chunks)} relevant chunks for query: {query}")
             return chunks
             
         except Exception as e:
             logger.error(f"Error retrieving chunks for query '{query}': {e}")
+            return RetrievalResults.empty()
+    
+    def retrieve_relevant_chunks(self, query: str, n_results: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Retrieve relevant chunks based on the user's query.
+        
+        Args:
+            query (str): The user's query/question
+            n_results (int): Number of relevant chunks to retrieve, defaults to self.n_results
+            
+        Returns:
+            List[Dict[str, Any]]: List of relevant chunks with their metadata
+        """
+        return self.retrieve(query, n_results).to_dicts()
+    
+    def retrieve_batch(self, queries: List[str], n_results: Optional[int] = None,
+                       where: Optional[Dict[str, Any]] = None) -> List[RetrievalResults]:
+        """
+        Retrieve relevant chunks for many queries with one embedding call and one vector query.
+        
+        Args:
+            queries (List[str]): The queries to retrieve for
+            n_results (int): Number of relevant chunks to retrieve per query, defaults to self.n_results
+            where (Dict[str, Any]): Optional ChromaDB metadata filter
+            
+        Returns:
+            List[RetrievalResults]: Relevant chunks for each query, in order
+        """
+        if not queries:
             return []
+        
+        try:
+            embeddings = self.embedding_function(queries)
+            results = self.collection.query(
+                query_embeddings=embeddings,
+                n_results=n_results or self.n_results,
+                where=where,
+                include=["documents", "metadatas", "distances"]
+            )
+            
+            logger.info(f"Retrieved chunks for a batch of {len(queries)} queries")
+            return [RetrievalResults.from_query(results, row) for row in range(len(queries))]
+            
+        except Exception as e:
+            logger.error(f"Error retrieving chunks for a batch of {len(queries)} queries: {e}")
+            return [RetrievalResults.empty() for _ in queries]
     
-    def get_mental_health_context(self, user_message: str) -> str:
+    def format_context(self, chunks: RetrievalResults, min_score: Optional[float] = 0.5) -> str:
         """
-        Get relevant mental health context for the user's message.
+        Format retrieved chunks as context for the language model.
         
         Args:
-            user_message (str): The user's message
+            chunks (RetrievalResults): Retrieved chunks
+            min_score (float): Minimum relevance score for a chunk to be included,
+                or None to include all chunks (e.g. when already re-ranked)
             
         Returns:
             str: Formatted context from relevant chunks
         """
-        chunks = self.retrieve_relevant_chunks(user_message, n_results=3)
-        
         if not chunks:
             return "I'm here to help with mental health support. How can I assist you today?"
         
-        # Format context from retrieved chunks
-        context_parts = []
-        for chunk in chunks:
-            if chunk['relevance_score'] > 0.5:  # Only include highly relevant chunks
-                context_parts.append(chunk['content'])
+        # Only include highly relevant chunks
+        if min_score is not None:
+            chunks = chunks.filter(min_score)
+        context_parts = chunks.contents()
         
         if context_parts:
             context = "\n\n".join(context_parts)
@@ -96,6 +282,47 @@ class MentalHealthRetriever:
         else:
             return "I'm here to provide mental health support. How can I help you today?"
     
+    def get_mental_health_context(self, user_message: str) -> str:
+        """
+        Get relevant mental health context for the user's message.
+        
+        Args:
+            user_message (str): The user's message
+            
+        Returns:
+            str: Formatted context from relevant chunks
+        """
+        candidates = self.retrieve(user_message, n_results=self.context_candidates)
+        return self.build_context(user_message, candidates)
+    
+    @property
+    def context_candidates(self) -> int:
+        """Number of chunks to retrieve for `build_context`."""
+        # Over-fetch cheaply when the cross-encoder picks the best ones
+        return self.context_results if self.reranker is None else self.rerank_candidates
+    
+    def build_context(self, user_message: str, candidates: RetrievalResults) -> str:
+        """
+        Build the chat context from chunks already retrieved for a message.
+        
+        Args:
+            user_message (str): The user's message
+            candidates (RetrievalResults): Chunks retrieved for the message,
+                normally `context_candidates` of them
+            
+        Returns:
+            str: Formatted context from relevant chunks
+        """
+        if self.reranker is None:
+            return self.format_context(candidates)
+        
+        reranked = self.reranker.rerank(user_message, candidates, top_k=self.rerank_top_k)
+        if reranked:
+            return self.format_context(reranked, min_score=None)
+        
+        # Re-ranking was skipped under load or kept nothing; fall back to the bi-encoder order
+        return self.format_context(candidates.take(self.context_results))
+    
     def get_therapeutic_suggestions(self, user_message: str) -> List[str]:
         """
         Get therapeutic suggestions based on the user's message.
@@ -106,17 +333,10 @@ class MentalHealthRetriever:
         Returns:
             List[str]: List of therapeutic suggestions
         """
-        chunks = self.retrieve_relevant_chunks(user_message, n_results=5)
-        
-        suggestions = []
-        for chunk in chunks:
-            if chunk['relevance_score'] > 0.6:
-                # Extract actionable suggestions from the content
-                content = chunk['content']
-                if any(keyword in content.lower() for keyword in ['try', 'practice', 'exercise', 'technique', 'method']):
-                    suggestions.append(content)
+        # Actionable chunks are flagged at ingestion time (see features.py)
+        chunks = self.retrieve(user_message, where={"actionable": True})
         
-        return suggestions[:3]  # Return top 3 suggestions
+        return chunks.filter(0.6).take(3).contents()  # Return top 3 suggestions
     
     def get_emergency_resources(self) -> Dict[str, str]:
         """
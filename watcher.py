@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+import logging
+from typing import Dict, Tuple, Optional, Callable
+from loader import DocumentLoader, SUPPORTED_EXTENSIONS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class KnowledgeBaseWatcher:
+    """
+    Watches a knowledge directory and incrementally reindexes changed files.
+    
+    Uses polling of file modification times, so it needs no extra service or
+    package. Changes are debounced: a file is only reindexed once it has stopped
+    changing for `debounce` seconds. Only added or modified files are re-chunked
+    and upserted, and chunks of removed files are deleted. The retriever queries
+    the same ChromaDB collection, so it sees updates without a restart.
+    """
+    
+    def __init__(self, loader: DocumentLoader, directory_path: str, poll_interval: float = 2.0,
+                 debounce: float = 1.0, on_change: Optional[Callable[[Dict[str, int]], None]] = None):
+        """
+        Initialize the watcher.
+        
+        Args:
+            loader (DocumentLoader): Loader used to index and remove files
+            directory_path (str): Directory to watch
+            poll_interval (float): Seconds between directory scans
+            debounce (float): Seconds a file must be unchanged before it is reindexed
+            on_change (Callable): Optional callback receiving the stats of each reindex
+        """
+        self.loader = loader
+        self.directory_path = os.path.abspath(directory_path)
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.on_change = on_change
+        
+        self._snapshot: Dict[str, Tuple[float, int]] = {}
+        self._pending: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def scan(self) -> Dict[str, Tuple[float, int]]:
+        """
+        Get the modification time and size of every supported file in the directory.
+        
+        Returns:
+            Dict[str, Tuple[float, int]]: (mtime, size) by absolute file path
+        """
+        snapshot = {}
+        try:
+            with os.scandir(self.directory_path) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.endswith(SUPPORTED_EXTENSIONS):
+                        stat = entry.stat()
+                        snapshot[entry.path] = (stat.st_mtime, stat.st_size)
+        except FileNotFoundError:
+            logger.error(f"Directory does not exist: {self.directory_path}")
+        return snapshot
+    
+    def sync(self) -> Dict[str, int]:
+        """
+        Bring the collection in line with the directory.
+        
+        Indexes new and modified files (unchanged files are skipped by content
+        hash) and removes chunks of files that are no longer present.
+        
+        Returns:
+            Dict[str, int]: Number of files indexed and removed
+        """
+        self._snapshot = self.scan()
+        indexed = sum(1 for path in self._snapshot if self.loader.index_file(path))
+        
+        removed = 0
+        for path in self.loader.get_indexed_files():
+            if os.path.dirname(path) == self.directory_path and path not in self._snapshot:
+                self.loader.remove_file(path)
+                removed += 1
+        
+        stats = {"indexed": indexed, "removed": removed}
+        logger.info(f"Synced knowledge directory {self.directory_path}: {stats}")
+        return stats
+    
+    def poll(self) -> Dict[str, int]:
+        """
+        Scan the directory once and reindex files whose changes have settled.
+        
+        Returns:
+            Dict[str, int]: Number of files indexed and removed in this poll
+        """
+        now = time.monotonic()
+        snapshot = self.scan()
+        
+        # Record when each changed, added or removed file last changed
+        for path in snapshot.keys() | self._snapshot.keys():
+            if snapshot.get(path) != self._snapshot.get(path):
+                self._pending[path] = now
+        self._snapshot = snapshot
+        
+        stats = {"indexed": 0, "removed": 0}
+        for path, changed_at in list(self._pending.items()):
+            if now - changed_at < self.debounce:
+                continue
+            del self._pending[path]
+            
+            if path in snapshot:
+                if self.loader.index_file(path):
+                    stats["indexed"] += 1
+            elif self.loader.remove_file(path):
+                stats["removed"] += 1
+        
+        if stats["indexed"] or stats["removed"]:
+            logger.info(f"Reindexed knowledge directory {self.directory_path}: {stats}")
+            if self.on_change:
+                self.on_change(stats)
+        return stats
+    
+    def run(self):
+        """Sync the directory, then poll for changes until stopped."""
+        try:
+            self.sync()
+        except Exception as e:
+            logger.error(f"Error syncing {self.directory_path}: {e}")
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Error watching {self.directory_path}: {e}")
+    
+    def start(self) -> threading.Thread:
+        """
+        Run the watcher in a background thread.
+        
+        Returns:
+            threading.Thread: The watcher thread
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="knowledge-watcher", daemon=True)
+        self._thread.start()
+        return self._thread
+    
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+if __name__ == "__main__":
+    import sys
+    
+    # Watch a knowledge directory in the foreground
+    directory = sys.argv[1] if len(sys.argv) > 1 else "documents"
+    watcher = KnowledgeBaseWatcher(DocumentLoader(), directory)
+    print(f"Watching {directory} for changes. Press Ctrl+C to stop.")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("Stopped watching.")